@@ -4,39 +4,56 @@ Account info - check balance, positions, and allowances
 """
 
 import os
+import glob
 import sys
 import json
+import argparse
+from concurrent.futures import ThreadPoolExecutor
 import requests
 from requests.adapters import HTTPAdapter, Retry
 
 # Add venv to path (version-agnostic)
-VENV_BASE = os.path.expanduser("~/polymarket-venv/lib")
-if os.path.exists(VENV_BASE):
-    for entry in os.listdir(VENV_BASE):
-        if entry.startswith("python"):
-            site_packages = os.path.join(VENV_BASE, entry, "site-packages")
-            if site_packages not in sys.path:
-                sys.path.insert(0, site_packages)
-            break
+# POLYMARKET_SITE_PACKAGES (printed by setup.sh) skips the directory scan
+site_packages = os.environ.get("POLYMARKET_SITE_PACKAGES")
+if not site_packages or not os.path.isdir(site_packages):
+    VENV_BASE = os.path.expanduser("~/polymarket-venv/lib")
+    hits = glob.glob(os.path.join(VENV_BASE, "python*", "site-packages"))
+    site_packages = hits[0] if hits else None
+if site_packages:
+    # Exported so child processes inherit the resolved path and skip the scan
+    os.environ["POLYMARKET_SITE_PACKAGES"] = site_packages
+    if site_packages not in sys.path:
+        sys.path.insert(0, site_packages)
 
 from eth_account import Account
 from py_clob_client.client import ClobClient
 
+from clob_creds import load_or_derive_creds
+
+
+_SESSION = None
+
 
 def get_session():
-    """Create requests session with retry logic"""
-    session = requests.Session()
-    retries = Retry(
-        total=3,
-        backoff_factor=0.5,
-        status_forcelist=[500, 502, 503, 504],
-        allowed_methods=["GET"]
-    )
-    session.mount("https://", HTTPAdapter(max_retries=retries))
-    return session
+    """Return the shared requests session (keep-alive, retry logic)"""
+    global _SESSION
+    if _SESSION is None:
+        _SESSION = requests.Session()
+        retries = Retry(
+            total=3,
+            backoff_factor=0.5,
+            status_forcelist=[500, 502, 503, 504],
+            allowed_methods=["GET"]
+        )
+        _SESSION.mount("https://", HTTPAdapter(
+            max_retries=retries,
+            pool_connections=4,
+            pool_maxsize=8
+        ))
+    return _SESSION
 
 
-def get_client():
+def get_client(refresh_creds=False):
     """Initialize authenticated CLOB client"""
     pk = os.environ.get("POLYMARKET_PRIVATE_KEY")
     if not pk:
@@ -54,7 +71,7 @@ def get_client():
     )
     
     # Get API credentials
-    creds = client.derive_api_key()
+    creds = load_or_derive_creds(client, account.address, refresh=refresh_creds)
     client.set_api_creds(creds)
     
     return client, account.address, funder
@@ -87,18 +104,30 @@ def get_trades(address, limit=10):
 
 
 def main():
-    client, address, funder = get_client()
+    parser = argparse.ArgumentParser(description="Show Polymarket account summary")
+    parser.add_argument("--refresh-creds", action="store_true",
+                       help="Re-derive cached CLOB API credentials")
+    
+    args = parser.parse_args()
+    client, address, funder = get_client(refresh_creds=args.refresh_creds)
     
     print(f"=== Polymarket Account ===")
     print(f"Signing Address: {address}")
     print(f"Funder Address:  {funder}")
     print()
     
+    # Fire the independent lookups concurrently over the shared session
+    with ThreadPoolExecutor(max_workers=4) as ex:
+        f_positions = ex.submit(get_positions, address)
+        f_funder_positions = ex.submit(get_positions, funder) if funder != address else None
+        f_orders = ex.submit(client.get_orders)
+        f_trades = ex.submit(get_trades, funder, 5)
+    
     # Get positions (check signing address - that's where positions are tracked)
-    positions = get_positions(address)
-    if not positions:
+    positions = f_positions.result()
+    if not positions and f_funder_positions:
         # Fallback to funder address
-        positions = get_positions(funder)
+        positions = f_funder_positions.result()
     if positions:
         print(f"=== Positions ({len(positions)}) ===")
         total_value = 0
@@ -121,7 +150,7 @@ def main():
     
     # Get open orders
     try:
-        orders = client.get_orders()
+        orders = f_orders.result()
         if orders:
             print(f"=== Open Orders ({len(orders)}) ===")
             for o in orders[:10]:
@@ -133,7 +162,7 @@ def main():
     print()
     
     # Recent trades
-    trades = get_trades(funder, limit=5)
+    trades = f_trades.result()
     if trades:
         print(f"=== Recent Trades ===")
         for t in trades[:5]:
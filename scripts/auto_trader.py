@@ -4,27 +4,37 @@ Autonomous Polymarket Trader
 Finds short-term markets, researches them, and makes trades.
 """
 
+import io
 import os
 import sys
+import glob
 import json
+import argparse
 import subprocess
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
 
 # Add venv to path (version-agnostic)
-VENV_BASE = os.path.expanduser("~/polymarket-venv/lib")
-if os.path.exists(VENV_BASE):
-    for entry in os.listdir(VENV_BASE):
-        if entry.startswith("python"):
-            site_packages = os.path.join(VENV_BASE, entry, "site-packages")
-            if site_packages not in sys.path:
-                sys.path.insert(0, site_packages)
-            break
+# POLYMARKET_SITE_PACKAGES (printed by setup.sh) skips the directory scan
+site_packages = os.environ.get("POLYMARKET_SITE_PACKAGES")
+if not site_packages or not os.path.isdir(site_packages):
+    VENV_BASE = os.path.expanduser("~/polymarket-venv/lib")
+    hits = glob.glob(os.path.join(VENV_BASE, "python*", "site-packages"))
+    site_packages = hits[0] if hits else None
+if site_packages:
+    # Exported so child processes inherit the resolved path and skip the scan
+    os.environ["POLYMARKET_SITE_PACKAGES"] = site_packages
+    if site_packages not in sys.path:
+        sys.path.insert(0, site_packages)
 
 import requests
-from requests.adapters import HTTPAdapter, Retry
-from eth_account import Account
-from py_clob_client.client import ClobClient
+
+from clob_creds import load_or_derive_creds
+from gamma_cache import cached_get_json
+
+# eth_account / py_clob_client are imported inside get_client(): they are slow
+# to import and the scan path never needs them
 
 SKILL_DIR = Path(__file__).parent.parent
 CONFIG_PATH = SKILL_DIR / "config.json"
@@ -33,21 +43,12 @@ CONFIG_PATH = SKILL_DIR / "config.json"
 CONFIG_DIR = Path(os.environ.get("XDG_CONFIG_HOME", os.path.expanduser("~/.config"))) / "polymarket-trader"
 CONFIG_DIR.mkdir(parents=True, exist_ok=True)
 STATE_PATH = CONFIG_DIR / "state.json"
+MAX_TRADE_HISTORY = 1000  # keep state.json bounded
 
-GAMMA_API = "https://gamma-api.polymarket.com"
-
+EVENTS_CACHE_TTL = 60  # seconds
+EVENTS_PAGE_SIZE = 50
 
-def get_session():
-    """Create requests session with retry logic"""
-    session = requests.Session()
-    retries = Retry(
-        total=3,
-        backoff_factor=0.5,
-        status_forcelist=[500, 502, 503, 504],
-        allowed_methods=["GET", "POST"]
-    )
-    session.mount("https://", HTTPAdapter(max_retries=retries))
-    return session
+GAMMA_API = "https://gamma-api.polymarket.com"
 
 
 def load_config():
@@ -74,9 +75,12 @@ def load_state():
 
 
 def save_state(state):
-    """Save trading state"""
-    with open(STATE_PATH, 'w') as f:
+    """Save trading state (atomically, so a crash never leaves a torn file)"""
+    # Per-process temp name, so concurrent runs never write the same temp file
+    tmp = STATE_PATH.with_suffix(f".{os.getpid()}.tmp")
+    with open(tmp, 'w') as f:
         json.dump(state, f, indent=2, default=str)
+    os.replace(tmp, STATE_PATH)
 
 
 def check_safety_limits(state, config, trade_size_usd):
@@ -111,6 +115,7 @@ def check_safety_limits(state, config, trade_size_usd):
 def record_trade(state, trade_info):
     """Record a trade and update counters"""
     state["trades"].append(trade_info)
+    del state["trades"][:-MAX_TRADE_HISTORY]
     state["trades_today"] = state.get("trades_today", 0) + 1
     state["last_trade_time"] = datetime.now(timezone.utc).isoformat()
     
@@ -131,6 +136,9 @@ def get_client():
     if not pk:
         return None
     
+    from eth_account import Account
+    from py_clob_client.client import ClobClient
+    
     account = Account.from_key(pk)
     funder = os.environ.get("POLYMARKET_FUNDER", account.address)
     
@@ -142,41 +150,77 @@ def get_client():
         funder=funder
     )
     
-    creds = client.derive_api_key()
+    creds = load_or_derive_creds(client, account.address)
     client.set_api_creds(creds)
     return client
 
 
+def fetch_active_events(limit=200):
+    """Fetch active events, requesting fixed-size pages concurrently"""
+    url = f"{GAMMA_API}/events"
+    
+    def fetch_page(offset):
+        # A fixed sort on the immutable id keeps page boundaries stable even
+        # when pages come from the cache at slightly different times
+        params = {
+            "active": "true",
+            "closed": "false",
+            "order": "id",
+            "ascending": "true",
+            "limit": min(EVENTS_PAGE_SIZE, limit - offset),
+            "offset": offset
+        }
+        return cached_get_json(url, params, ttl=EVENTS_CACHE_TTL, timeout=30)
+    
+    offsets = range(0, limit, EVENTS_PAGE_SIZE)
+    if not offsets:
+        return []
+    
+    with ThreadPoolExecutor(max_workers=len(offsets)) as ex:
+        pages = list(ex.map(fetch_page, offsets))
+    
+    events = []
+    seen_ids = set()
+    for page in pages:
+        if not page:
+            break
+        # Drop events repeated across a page boundary
+        for event in page:
+            event_id = event.get("id")
+            if event_id is not None:
+                if event_id in seen_ids:
+                    continue
+                seen_ids.add(event_id)
+            events.append(event)
+        # A short page means we've hit the end
+        if len(page) < EVENTS_PAGE_SIZE:
+            break
+    return events
+
+
 def find_expiring_markets(max_days=7, min_hours=6, limit=50):
     """Find markets expiring within the specified window"""
     now = datetime.now(timezone.utc)
     max_date = now + timedelta(days=max_days)
     min_date = now + timedelta(hours=min_hours)
     
-    session = get_session()
-    
     # Fetch active events
-    url = f"{GAMMA_API}/events"
-    params = {
-        "active": "true",
-        "closed": "false",
-        "limit": 200
-    }
-    
     try:
-        r = session.get(url, params=params, timeout=30)
-        if r.status_code != 200:
-            return []
-        events = r.json()
+        events = fetch_active_events(limit=200)
     except requests.RequestException as e:
         print(f"Error fetching events: {e}", file=sys.stderr)
         return []
     
-    expiring = []
+    in_window = []
+    
+    # UTC "...Z" timestamps sort chronologically as strings, so reject
+    # out-of-window events before paying for a datetime parse
+    min_iso = min_date.strftime("%Y-%m-%dT%H:%M:%S")
+    max_iso = max_date.strftime("%Y-%m-%dT%H:%M:%S")
     
     for event in events:
         end_date_str = event.get("endDate")
-        if not end_date_str:
+        if not end_date_str or not (min_iso <= end_date_str[:19] <= max_iso):
             continue
         
         try:
@@ -186,20 +230,32 @@ def find_expiring_markets(max_days=7, min_hours=6, limit=50):
         
         # Check if within our window
         if min_date <= end_date <= max_date:
-            # Get volume
             volume = float(event.get("volume", 0) or 0)
-            
-            # Get markets from event
-            markets = event.get("markets", [])
-            for m in markets:
-                m["event_title"] = event.get("title")
-                m["event_end_date"] = end_date
-                m["event_volume"] = volume
-                m["hours_to_expiry"] = (end_date - now).total_seconds() / 3600
-                expiring.append(m)
-    
-    # Sort by volume (most liquid first)
-    expiring.sort(key=lambda x: x.get("event_volume", 0), reverse=True)
+            in_window.append((volume, end_date, event))
+    
+    # Sort events by volume (most liquid first). All markets in an event share
+    # its volume, so sorting events is equivalent to sorting their markets and
+    # lets us stop expanding once we have enough.
+    in_window.sort(key=lambda x: x[0], reverse=True)
+    
+    expiring = []
+    for volume, end_date, event in in_window:
+        # Event-level fields are the same for every market in the event
+        common = {
+            "event_title": event.get("title"),
+            "event_end_date": end_date,
+            "event_volume": volume,
+            "hours_to_expiry": (end_date - now).total_seconds() / 3600
+        }
+        
+        # Get markets from event
+        markets = event.get("markets", [])
+        for m in markets:
+            m.update(common)
+            expiring.append(m)
+        if len(expiring) >= limit:
+            break
+    
     return expiring[:limit]
 
 
@@ -224,6 +280,41 @@ def research_market(question, context=""):
     return ""
 
 
+def research_markets(questions, max_workers=8):
+    """
+    Research several questions at once.
+    Duplicate questions share one mcporter call; distinct ones run in parallel.
+    Returns research text aligned with the input list.
+    """
+    unique = list(dict.fromkeys(q for q in questions if q))
+    if not unique:
+        return [""] * len(questions)
+    
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(unique))) as ex:
+        results = dict(zip(unique, ex.map(research_market, unique)))
+    return [results.get(q, "") for q in questions]
+
+
+def parse_yes_price(market):
+    """
+    Parse the YES price from outcomePrices (JSON string or list).
+    The result is stored on the market dict so later callers skip the parse.
+    """
+    if "_yes_price" in market:
+        return market["_yes_price"]
+    
+    prices = market.get("outcomePrices") or []
+    try:
+        if isinstance(prices, str):
+            prices = json.loads(prices)
+        yes_price = float(prices[0]) if prices else 0.5
+    except (ValueError, TypeError, LookupError):
+        yes_price = 0.5
+    
+    market["_yes_price"] = yes_price
+    return yes_price
+
+
 def evaluate_opportunity(market, research_text, config):
     """
     Evaluate if a market presents a trading opportunity.
@@ -232,16 +323,7 @@ def evaluate_opportunity(market, research_text, config):
     question = market.get("question", market.get("event_title", ""))
     
     # Parse current prices
-    prices_str = market.get("outcomePrices", "[]")
-    try:
-        if isinstance(prices_str, str):
-            prices = json.loads(prices_str)
-        else:
-            prices = prices_str or []
-        yes_price = float(prices[0]) if prices else 0.5
-    except:
-        yes_price = 0.5
-    
+    yes_price = parse_yes_price(market)
     no_price = 1 - yes_price
     
     # Simple heuristic: look for extreme odds that research might contradict
@@ -271,11 +353,11 @@ def evaluate_opportunity(market, research_text, config):
 
 def format_opportunity_report(markets, evaluations):
     """Format a report of potential opportunities"""
-    report = []
-    report.append("=== Polymarket Opportunities Report ===")
-    report.append(f"Time: {datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M UTC')}")
-    report.append(f"Markets expiring soon: {len(markets)}")
-    report.append("")
+    buf = io.StringIO()
+    w = buf.write
+    w("=== Polymarket Opportunities Report ===\n")
+    w(f"Time: {datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M UTC')}\n")
+    w(f"Markets expiring soon: {len(markets)}\n")
     
     for market, eval_result in zip(markets[:10], evaluations[:10]):
         should_trade, side, confidence, reasoning = eval_result
@@ -284,24 +366,18 @@ def format_opportunity_report(markets, evaluations):
         hours = market.get("hours_to_expiry", 0)
         volume = market.get("event_volume", 0)
         
-        prices_str = market.get("outcomePrices", "[]")
-        try:
-            prices = json.loads(prices_str) if isinstance(prices_str, str) else prices_str or []
-            yes_price = float(prices[0]) if prices else 0.5
-        except:
-            yes_price = 0.5
+        yes_price = parse_yes_price(market)
         
         status = "TRADE" if should_trade else "WATCH"
         
-        report.append(f"{status} {question}...")
-        report.append(f"   YES: {yes_price*100:.1f}% | Expires: {hours:.0f}h | Vol: ${volume/1000:.0f}K")
-        report.append(f"   -> {reasoning}")
-        report.append("")
+        w(f"\n{status} {question}...\n")
+        w(f"   YES: {yes_price*100:.1f}% | Expires: {hours:.0f}h | Vol: ${volume/1000:.0f}K\n")
+        w(f"   -> {reasoning}\n")
     
-    return "\n".join(report)
+    return buf.getvalue()
 
 
-def main():
+def run_scan():
     print("=== Polymarket Auto-Trader ===")
     print(f"Time: {datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M UTC')}")
     print()
@@ -330,17 +406,20 @@ def main():
         print("No suitable markets found")
         return
     
+    # Research (disabled by default to save API calls - enable in config.json)
+    top_markets = markets[:10]
+    questions = [m.get("question", m.get("event_title", "")) for m in top_markets]
+    if config.get("research", {}).get("enabled", False):
+        print(f"\nResearching {len(questions)} markets...")
+        research = research_markets(questions)
+    else:
+        research = [""] * len(questions)
+    
     # Evaluate top markets
     evaluations = []
-    for market in markets[:10]:
-        question = market.get("question", market.get("event_title", ""))
+    for market, question, research_text in zip(top_markets, questions, research):
         print(f"\nAnalyzing: {question[:50]}...")
-        
-        # Research (disabled by default to save API calls - enable when ready)
-        # research = research_market(question)
-        research = ""
-        
-        eval_result = evaluate_opportunity(market, research, config)
+        eval_result = evaluate_opportunity(market, research_text, config)
         evaluations.append(eval_result)
     
     # Generate report
@@ -355,5 +434,42 @@ def main():
     return report
 
 
+def serve():
+    """
+    Long-running mode: read one command per line from stdin.
+    The requests session stays open between commands, so repeated scans
+    reuse pooled keep-alive connections to the Gamma API. A failing command
+    is reported on stderr and the loop keeps serving.
+    """
+    print("Serving - commands: scan, quit", flush=True)
+    for line in sys.stdin:
+        command = line.strip().lower()
+        if not command:
+            continue
+        if command in ("quit", "exit"):
+            break
+        try:
+            if command == "scan":
+                run_scan()
+            else:
+                print(f"Unknown command: {command}")
+        except Exception as e:
+            print(f"Error running {command}: {e}", file=sys.stderr)
+        sys.stdout.flush()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Autonomous Polymarket trader")
+    parser.add_argument("--serve", action="store_true",
+                       help="Stay running and read commands (scan, quit) from stdin")
+    
+    args = parser.parse_args()
+    
+    if args.serve:
+        serve()
+    else:
+        return run_scan()
+
+
 if __name__ == "__main__":
     main()
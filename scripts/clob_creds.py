@@ -0,0 +1,59 @@
+"""
+CLOB API credential cache shared by the trading scripts
+"""
+
+import os
+import json
+from pathlib import Path
+
+# XDG config directory (user-writable), shared with auto_trader.py state
+CONFIG_DIR = Path(os.environ.get("XDG_CONFIG_HOME", os.path.expanduser("~/.config"))) / "polymarket-trader"
+
+# API creds copied from the Polymarket UI; when all three are set, no derive is needed
+ENV_CREDS_VARS = ("POLYMARKET_API_KEY", "POLYMARKET_API_SECRET", "POLYMARKET_API_PASSPHRASE")
+
+
+def load_or_derive_creds(client, address, refresh=False):
+    """
+    Load CLOB API credentials for address, or derive and cache them.
+    Lookup order: POLYMARKET_API_KEY/_SECRET/_PASSPHRASE env vars, then the
+    on-disk cache, then a signed derive round-trip (refresh=True skips straight
+    to deriving).
+    """
+    # Imported here so scripts that never authenticate don't pay for the SDK
+    from py_clob_client.clob_types import ApiCreds
+    
+    creds_path = CONFIG_DIR / f"creds-{address.lower()}.json"
+    if not refresh:
+        env_creds = [os.environ.get(name) for name in ENV_CREDS_VARS]
+        if all(env_creds):
+            return ApiCreds(*env_creds)
+        try:
+            with open(creds_path) as f:
+                # Tighten a file left readable by an older version or by hand
+                if os.fstat(f.fileno()).st_mode & 0o077:
+                    os.chmod(creds_path, 0o600)
+                return ApiCreds(**json.load(f))
+        except (OSError, ValueError, TypeError):
+            pass
+    
+    creds = client.derive_api_key()
+    
+    # Write atomically with owner-only permissions from the start
+    tmp = creds_path.with_suffix(f".{os.getpid()}.tmp")
+    try:
+        CONFIG_DIR.mkdir(parents=True, exist_ok=True)
+        fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w") as f:
+            json.dump({
+                "api_key": creds.api_key,
+                "api_secret": creds.api_secret,
+                "api_passphrase": creds.api_passphrase
+            }, f)
+        os.replace(tmp, creds_path)
+    except OSError:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+    return creds
@@ -0,0 +1,107 @@
+"""
+Gamma API response cache shared by the market scripts
+"""
+
+import os
+import json
+import time
+import hashlib
+import requests
+from requests.adapters import HTTPAdapter, Retry
+from datetime import datetime
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional
+
+# Short-lived API response cache (safe to delete)
+CACHE_DIR = Path(os.environ.get("XDG_CACHE_HOME", os.path.expanduser("~/.cache"))) / "polymarket-trader"
+# Files older than this are pruned; keep it >= the longest TTL any caller passes
+CACHE_MAX_AGE = 600  # seconds
+
+_SESSION = None
+_USE_CACHE = True
+_PRUNED = False
+
+
+def get_session():
+    """Return the shared requests session (keep-alive, retry logic)"""
+    global _SESSION
+    if _SESSION is None:
+        _SESSION = requests.Session()
+        retries = Retry(
+            total=3,
+            backoff_factor=0.5,
+            status_forcelist=[500, 502, 503, 504],
+            allowed_methods=["GET"]
+        )
+        _SESSION.mount("https://", HTTPAdapter(
+            max_retries=retries,
+            pool_connections=4,
+            pool_maxsize=8
+        ))
+    return _SESSION
+
+
+def set_use_cache(enabled):
+    """Turn cache reads on or off (--no-cache); fresh responses are still written"""
+    global _USE_CACHE
+    _USE_CACHE = enabled
+
+
+def prune_cache(max_age=CACHE_MAX_AGE):
+    """Delete cache files (including orphaned temp files) older than max_age seconds"""
+    cutoff = time.time() - max_age
+    try:
+        entries = list(os.scandir(CACHE_DIR))
+    except OSError:
+        return
+    for entry in entries:
+        try:
+            if entry.is_file() and entry.stat().st_mtime < cutoff:
+                os.unlink(entry.path)
+        except OSError:
+            pass
+
+
+def cached_get_json(url, params=None, ttl=0, timeout=15):
+    """GET a JSON endpoint, reusing an on-disk copy younger than ttl seconds"""
+    global _PRUNED
+    key = hashlib.md5(f"{url}?{json.dumps(params, sort_keys=True)}".encode()).hexdigest()
+    cache_path = CACHE_DIR / f"{key}.json"
+    
+    if _USE_CACHE:
+        try:
+            if time.time() - cache_path.stat().st_mtime < ttl:
+                return json.loads(cache_path.read_bytes())
+        except (OSError, ValueError):
+            pass
+    
+    r = get_session().get(url, params=params, timeout=timeout)
+    if r.status_code != 200:
+        return None
+    data = r.json()
+    
+    # Write atomically so a concurrent run never reads a partial file
+    try:
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        tmp = cache_path.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_bytes(r.content)
+        tmp.replace(cache_path)
+    except OSError:
+        pass
+    
+    # Keys include dates and filter values, so stale files would pile up forever;
+    # sweep once per process
+    if not _PRUNED:
+        _PRUNED = True
+        prune_cache()
+    return data
+
+
+@lru_cache(maxsize=4096)
+def parse_end_date(value: str) -> Optional[datetime]:
+    """Parse an API ISO timestamp (cached: markets in an event share end dates)"""
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
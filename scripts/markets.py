@@ -8,28 +8,19 @@ import sys
 import json
 import argparse
 import requests
-from requests.adapters import HTTPAdapter, Retry
-from datetime import datetime
 
-GAMMA_API = "https://gamma-api.polymarket.com"
+from gamma_cache import cached_get_json, parse_end_date, set_use_cache
 
+GAMMA_API = "https://gamma-api.polymarket.com"
 
-def get_session():
-    """Create requests session with retry logic"""
-    session = requests.Session()
-    retries = Retry(
-        total=3,
-        backoff_factor=0.5,
-        status_forcelist=[500, 502, 503, 504],
-        allowed_methods=["GET"]
-    )
-    session.mount("https://", HTTPAdapter(max_retries=retries))
-    return session
+SEARCH_CACHE_TTL = 300  # seconds
+TRENDING_CACHE_TTL = 60
+CATEGORY_CACHE_TTL = 300
+DETAIL_CACHE_TTL = 600
 
 
 def search_markets(query, limit=10):
     """Search markets by query (client-side filtering since API doesn't support text search)"""
-    session = get_session()
     # Fetch active events
     url = f"{GAMMA_API}/events"
     params = {
@@ -38,10 +29,9 @@ def search_markets(query, limit=10):
         "limit": 200  # Fetch more to filter
     }
     try:
-        r = session.get(url, params=params, timeout=15)
-        if r.status_code != 200:
+        events = cached_get_json(url, params, ttl=SEARCH_CACHE_TTL)
+        if events is None:
             return []
-        events = r.json()
     except requests.RequestException as e:
         print(f"Error searching markets: {e}", file=sys.stderr)
         return []
@@ -71,7 +61,6 @@ def search_markets(query, limit=10):
 
 def get_trending(limit=10):
     """Get trending/active markets"""
-    session = get_session()
     url = f"{GAMMA_API}/markets"
     params = {
         "limit": limit,
@@ -80,9 +69,9 @@ def get_trending(limit=10):
         "ascending": "false"
     }
     try:
-        r = session.get(url, params=params, timeout=15)
-        if r.status_code == 200:
-            return r.json()
+        markets = cached_get_json(url, params, ttl=TRENDING_CACHE_TTL)
+        if markets is not None:
+            return markets
     except requests.RequestException as e:
         print(f"Error fetching trending: {e}", file=sys.stderr)
     return []
@@ -90,7 +79,6 @@ def get_trending(limit=10):
 
 def get_by_category(category, limit=10):
     """Get markets by category (politics, crypto, sports, etc)"""
-    session = get_session()
     # Map common categories to tags
     category_map = {
         "politics": "politics",
@@ -112,9 +100,9 @@ def get_by_category(category, limit=10):
         "ascending": "false"
     }
     try:
-        r = session.get(url, params=params, timeout=15)
-        if r.status_code == 200:
-            return r.json()
+        markets = cached_get_json(url, params, ttl=CATEGORY_CACHE_TTL)
+        if markets is not None:
+            return markets
     except requests.RequestException as e:
         print(f"Error fetching category: {e}", file=sys.stderr)
     return []
@@ -122,51 +110,33 @@ def get_by_category(category, limit=10):
 
 def get_market_detail(market_id):
     """Get detailed market info including order book"""
-    session = get_session()
-    
-    # Try events endpoint by slug first
-    url = f"{GAMMA_API}/events"
-    params = {"slug": market_id}
-    try:
-        r = session.get(url, params=params, timeout=15)
-        if r.status_code == 200:
-            events = r.json()
-            if events:
-                event = events[0]
-                # Include markets in the event
-                return event
-    except requests.RequestException:
-        pass
-    
-    # Try by ID
-    url = f"{GAMMA_API}/events/{market_id}"
-    try:
-        r = session.get(url, timeout=15)
-        if r.status_code == 200:
-            return r.json()
-    except requests.RequestException:
-        pass
+    # Slug lookups return a list, ID lookups a single object
+    slug_probes = [
+        (f"{GAMMA_API}/events", {"slug": market_id}),
+        (f"{GAMMA_API}/markets", {"slug": market_id}),
+    ]
+    id_probes = [
+        (f"{GAMMA_API}/events/{market_id}", None),
+        (f"{GAMMA_API}/markets/{market_id}", None),
+    ]
     
-    # Try markets endpoint
-    url = f"{GAMMA_API}/markets/{market_id}"
-    try:
-        r = session.get(url, timeout=15)
-        if r.status_code == 200:
-            return r.json()
-    except requests.RequestException:
-        pass
+    # Gamma IDs are numeric and slugs are not, so try the likely endpoints first
+    # (events before markets, so an event includes all its markets)
+    if market_id.isdigit():
+        probes = id_probes + slug_probes
+    else:
+        probes = slug_probes + id_probes
     
-    # Try markets by slug
-    url = f"{GAMMA_API}/markets"
-    params = {"slug": market_id}
-    try:
-        r = session.get(url, params=params, timeout=15)
-        if r.status_code == 200:
-            markets = r.json()
-            if markets:
-                return markets[0]
-    except requests.RequestException:
-        pass
+    for url, params in probes:
+        try:
+            data = cached_get_json(url, params, ttl=DETAIL_CACHE_TTL)
+        except requests.RequestException:
+            continue
+        if params is not None:
+            if data:
+                return data[0]
+        elif data is not None:
+            return data
     
     return None
 
@@ -233,11 +203,8 @@ def format_market(m, detailed=False):
     # End date
     end_date = m.get("endDate", m.get("end_date_iso"))
     if end_date:
-        try:
-            dt = datetime.fromisoformat(end_date.replace("Z", "+00:00"))
-            end_str = dt.strftime("%b %d, %Y")
-        except:
-            end_str = end_date[:10]
+        dt = parse_end_date(end_date) if isinstance(end_date, str) else None
+        end_str = dt.strftime("%b %d, %Y") if dt else end_date[:10]
     else:
         end_str = "?"
     
@@ -291,9 +258,14 @@ def main():
                        help="Search query, category name, or market ID")
     parser.add_argument("--limit", "-n", type=int, default=10,
                        help="Number of results")
+    parser.add_argument("--no-cache", action="store_true",
+                       help="Ignore cached API responses and refetch")
     
     args = parser.parse_args()
     
+    if args.no_cache:
+        set_use_cache(False)
+    
     if args.action == "search":
         if not args.query:
             print("Error: search requires a query")
@@ -4,24 +4,30 @@ Manage open orders
 """
 
 import os
+import glob
 import sys
 import argparse
 
 # Add venv to path (version-agnostic)
-VENV_BASE = os.path.expanduser("~/polymarket-venv/lib")
-if os.path.exists(VENV_BASE):
-    for entry in os.listdir(VENV_BASE):
-        if entry.startswith("python"):
-            site_packages = os.path.join(VENV_BASE, entry, "site-packages")
-            if site_packages not in sys.path:
-                sys.path.insert(0, site_packages)
-            break
+# POLYMARKET_SITE_PACKAGES (printed by setup.sh) skips the directory scan
+site_packages = os.environ.get("POLYMARKET_SITE_PACKAGES")
+if not site_packages or not os.path.isdir(site_packages):
+    VENV_BASE = os.path.expanduser("~/polymarket-venv/lib")
+    hits = glob.glob(os.path.join(VENV_BASE, "python*", "site-packages"))
+    site_packages = hits[0] if hits else None
+if site_packages:
+    # Exported so child processes inherit the resolved path and skip the scan
+    os.environ["POLYMARKET_SITE_PACKAGES"] = site_packages
+    if site_packages not in sys.path:
+        sys.path.insert(0, site_packages)
 
 from eth_account import Account
 from py_clob_client.client import ClobClient
 
+from clob_creds import load_or_derive_creds
 
-def get_client():
+
+def get_client(refresh_creds=False):
     """Initialize authenticated CLOB client"""
     pk = os.environ.get("POLYMARKET_PRIVATE_KEY")
     if not pk:
@@ -38,7 +44,7 @@ def get_client():
         signature_type=0,  # EOA
     )
     
-    creds = client.derive_api_key()
+    creds = load_or_derive_creds(client, account.address, refresh=refresh_creds)
     client.set_api_creds(creds)
     
     return client
@@ -80,6 +86,32 @@ def cancel_order(client, order_id):
         return None
 
 
+def cancel_many(client, order_ids):
+    """Cancel several orders in one batch request"""
+    try:
+        result = client.cancel_orders(order_ids)
+    except Exception as e:
+        print(f"X Error cancelling orders: {e}")
+        return None
+    
+    # Partial success is normal (IDs already filled or cancelled), so report
+    # what the endpoint says rather than assuming every ID went through
+    response = result if isinstance(result, dict) else {}
+    canceled = response.get("canceled") or []
+    not_canceled = response.get("not_canceled") or {}
+    status = "OK" if canceled else "X"
+    print(f"{status} {len(canceled)}/{len(order_ids)} orders cancelled")
+    for order_id in canceled:
+        print(f"   cancelled: {order_id}")
+    if isinstance(not_canceled, dict):
+        for order_id, reason in not_canceled.items():
+            print(f"X  not cancelled: {order_id} ({reason})")
+    else:
+        for order_id in not_canceled:
+            print(f"X  not cancelled: {order_id}")
+    return result
+
+
 def cancel_all(client):
     """Cancel all open orders"""
     try:
@@ -97,18 +129,39 @@ def main():
                        help="Action to perform")
     parser.add_argument("order_id", nargs="?",
                        help="Order ID (for cancel)")
+    parser.add_argument("--ids",
+                       help="Comma-separated order IDs to cancel in one request")
+    parser.add_argument("--refresh-creds", action="store_true",
+                       help="Re-derive cached CLOB API credentials")
     
     args = parser.parse_args()
-    client = get_client()
+    
+    # Validate --ids before authenticating, so a bad list never sends a request
+    if args.ids is not None and args.action != "cancel":
+        parser.error("--ids is only valid with the cancel action")
+    if args.ids is not None and args.order_id:
+        parser.error("pass either an order_id or --ids, not both")
+    
+    order_ids = None
+    if args.ids is not None:
+        order_ids = [i.strip() for i in args.ids.split(",") if i.strip()]
+        if not order_ids:
+            print("Error: --ids needs at least one order ID")
+            sys.exit(1)
+    
+    client = get_client(refresh_creds=args.refresh_creds)
     
     if args.action == "list":
         list_orders(client)
     
     elif args.action == "cancel":
-        if not args.order_id:
-            print("Error: order_id required for cancel")
+        if order_ids:
+            cancel_many(client, order_ids)
+        elif args.order_id:
+            cancel_order(client, args.order_id)
+        else:
+            print("Error: order_id or --ids required for cancel")
             sys.exit(1)
-        cancel_order(client, args.order_id)
     
     elif args.action == "cancel-all":
         confirm = input("Cancel ALL open orders? (yes/no): ").strip().lower()
@@ -5,78 +5,126 @@ Systematically scans ALL active markets to find trading opportunities.
 """
 
 import os
+import re
 import sys
 import json
+import heapq
 import argparse
 import requests
-from requests.adapters import HTTPAdapter, Retry
-from datetime import datetime, timedelta
+from bisect import bisect_left
+from concurrent.futures import ThreadPoolExecutor
+from operator import attrgetter
+from datetime import datetime, timedelta, timezone
+from dataclasses import dataclass, asdict
 from typing import List, Dict, Any, Optional
 import math
 
+from gamma_cache import cached_get_json, parse_end_date, set_use_cache
+
 GAMMA_API = "https://gamma-api.polymarket.com"
 
+MARKETS_CACHE_TTL = 300  # seconds
 
-def get_session():
-    """Create requests session with retry logic"""
-    session = requests.Session()
-    retries = Retry(
-        total=3,
-        backoff_factor=0.5,
-        status_forcelist=[500, 502, 503, 504],
-        allowed_methods=["GET"]
-    )
-    session.mount("https://", HTTPAdapter(max_retries=retries))
-    return session
+
+def fetch_markets_page(
+    offset: int,
+    batch_size: int = 100,
+    min_volume: float = 0,
+    min_liquidity: float = 0,
+    end_date_min: Optional[str] = None
+) -> Optional[List[Dict]]:
+    """Fetch one page of active markets (None on failure)"""
+    url = f"{GAMMA_API}/markets"
+    params = {
+        "limit": batch_size,
+        "offset": offset,
+        "active": "true",
+        "closed": "false",
+        "order": "volume24hr",
+        "ascending": "false"
+    }
+    # Server-side pre-filters: markets we'd drop anyway are never transferred
+    if min_volume:
+        params["volume_num_min"] = str(min_volume)
+    if min_liquidity:
+        params["liquidity_num_min"] = str(min_liquidity)
+    if end_date_min:
+        params["end_date_min"] = end_date_min
+    
+    try:
+        markets = cached_get_json(url, params, ttl=MARKETS_CACHE_TTL)
+        if markets is None:
+            print(f"API request failed (offset {offset})", file=sys.stderr)
+        return markets
+    except requests.RequestException as e:
+        print(f"Error fetching markets: {e}", file=sys.stderr)
+        return None
 
 
-def fetch_all_active_markets(limit: int = 500) -> List[Dict]:
-    """Fetch all active markets from Polymarket"""
-    session = get_session()
-    all_markets = []
-    offset = 0
+def fetch_all_active_markets(
+    limit: int = 500,
+    min_volume: float = 0,
+    min_liquidity: float = 0,
+    end_date_min: Optional[str] = None
+) -> List[Dict]:
+    """Fetch all active markets from Polymarket (pages are requested concurrently)"""
     batch_size = 100
+    offsets = range(0, limit, batch_size)
+    if not offsets:
+        return []
     
-    while len(all_markets) < limit:
-        url = f"{GAMMA_API}/markets"
-        params = {
-            "limit": batch_size,
-            "offset": offset,
-            "active": "true",
-            "closed": "false",
-            "order": "volume24hr",
-            "ascending": "false"
-        }
+    def fetch(offset):
+        return fetch_markets_page(offset, batch_size, min_volume, min_liquidity, end_date_min)
+    
+    with ThreadPoolExecutor(max_workers=min(8, len(offsets))) as ex:
+        pages = list(ex.map(fetch, offsets))
+    
+    all_markets = []
+    for markets in pages:
+        if not markets:
+            break
+        all_markets.extend(markets)
         
-        try:
-            r = session.get(url, params=params, timeout=15)
-            if r.status_code != 200:
-                print(f"API returned status {r.status_code}", file=sys.stderr)
-                break
-            
-            markets = r.json()
-            if not markets:
-                break
-                
-            all_markets.extend(markets)
-            offset += batch_size
-            
-            # If we got fewer than batch_size, we've hit the end
-            if len(markets) < batch_size:
-                break
-                
-        except requests.RequestException as e:
-            print(f"Error fetching markets: {e}", file=sys.stderr)
+        # If we got fewer than batch_size, we've hit the end
+        if len(markets) < batch_size:
             break
     
     return all_markets[:limit]
 
 
-def parse_market_data(m: Dict) -> Optional[Dict]:
-    """Parse market into standardized format with all relevant data"""
+@dataclass(slots=True)
+class ParsedMarket:
+    """A market normalized for scanning (slots: compact, fast attribute access)"""
+    question: str
+    slug: str
+    market_id: str
+    yes_price: float
+    no_price: float
+    volume: float
+    volume_24h: float
+    liquidity: float
+    end_date: Optional[datetime]
+    token_ids: Dict[str, str]
+    url: str
+    category: str = "other"
+    score: float = 0.0
+
+
+def _to_float(value) -> float:
+    """Coerce an API number (often a string) to float, defaulting to 0"""
     try:
-        question = m.get("question", m.get("title", ""))
-        if not question:
+        return float(value)
+    except (ValueError, TypeError):
+        return 0
+
+
+def quick_market_fields(m: Dict) -> Optional[tuple]:
+    """
+    Extract only what the scan filters need: (yes_price, no_price, volume, liquidity).
+    Returns None for markets without a question or a YES price.
+    """
+    try:
+        if not m.get("question", m.get("title", "")):
             return None
         
         # Parse prices
@@ -111,34 +159,35 @@ def parse_market_data(m: Dict) -> Optional[Dict]:
         if yes_price is None:
             return None
         
-        # Volume
-        vol = m.get("volumeNum", m.get("volume", 0))
-        try:
-            vol = float(vol)
-        except (ValueError, TypeError):
-            vol = 0
+        # Volume / liquidity
+        vol = _to_float(m.get("volumeNum", m.get("volume", 0)))
+        liquidity = _to_float(m.get("liquidity", 0))
         
-        vol_24h = m.get("volume24hr", 0)
-        try:
-            vol_24h = float(vol_24h)
-        except (ValueError, TypeError):
-            vol_24h = 0
+        return yes_price, no_price, vol, liquidity
+    except Exception:
+        return None
+
+
+def parse_market_data(m: Dict, quick: Optional[tuple] = None) -> Optional[ParsedMarket]:
+    """
+    Parse market into standardized format with all relevant data.
+    Pass quick (from quick_market_fields) to avoid re-extracting prices.
+    """
+    if quick is None:
+        quick = quick_market_fields(m)
+        if quick is None:
+            return None
+    yes_price, no_price, vol, liquidity = quick
+    
+    try:
+        question = m.get("question", m.get("title", ""))
+        tokens = m.get("tokens", [])
         
-        # Liquidity
-        liquidity = m.get("liquidity", 0)
-        try:
-            liquidity = float(liquidity)
-        except (ValueError, TypeError):
-            liquidity = 0
+        vol_24h = _to_float(m.get("volume24hr", 0))
         
         # End date
         end_date = m.get("endDate", m.get("end_date_iso"))
-        end_dt = None
-        if end_date:
-            try:
-                end_dt = datetime.fromisoformat(end_date.replace("Z", "+00:00"))
-            except:
-                pass
+        end_dt = parse_end_date(end_date) if isinstance(end_date, str) and end_date else None
         
         # Token IDs for trading
         token_ids = {}
@@ -156,80 +205,85 @@ def parse_market_data(m: Dict) -> Optional[Dict]:
                 token_ids["yes"] = clob_tokens[0]
                 token_ids["no"] = clob_tokens[1]
         
-        return {
-            "question": question,
-            "slug": m.get("slug", ""),
-            "market_id": m.get("id", m.get("condition_id", "")),
-            "yes_price": yes_price,
-            "no_price": no_price if no_price else (1 - yes_price),
-            "volume": vol,
-            "volume_24h": vol_24h,
-            "liquidity": liquidity,
-            "end_date": end_dt,
-            "token_ids": token_ids,
-            "url": f"https://polymarket.com/event/{m.get('slug', '')}"
-        }
+        return ParsedMarket(
+            question=question,
+            slug=m.get("slug", ""),
+            market_id=m.get("id", m.get("condition_id", "")),
+            yes_price=yes_price,
+            no_price=no_price if no_price else (1 - yes_price),
+            volume=vol,
+            volume_24h=vol_24h,
+            liquidity=liquidity,
+            end_date=end_dt,
+            token_ids=token_ids,
+            url=f"https://polymarket.com/event/{m.get('slug', '')}"
+        )
     except Exception as e:
         return None
 
 
-def categorize_market(question: str) -> str:
-    """Attempt to categorize market by keywords"""
-    q = question.lower()
-    
+# Category keywords, checked in priority order (first match wins).
+# Matching is plain substring search on the lowercased question.
+CATEGORY_KEYWORDS = [
     # Sports
-    sports_keywords = ["nba", "nfl", "nhl", "mlb", "premier league", "champions league", 
-                       "vs.", "game", "match", "winner", "playoff", "super bowl", 
-                       "world cup", "olympics", "tennis", "golf", "f1", "formula",
-                       "boxing", "ufc", "mma", "spread:", "o/u", "lol:", "esports"]
-    if any(k in q for k in sports_keywords):
-        return "sports"
-    
+    ("sports", ["nba", "nfl", "nhl", "mlb", "premier league", "champions league",
+                "vs.", "game", "match", "winner", "playoff", "super bowl",
+                "world cup", "olympics", "tennis", "golf", "f1", "formula",
+                "boxing", "ufc", "mma", "spread:", "o/u", "lol:", "esports"]),
     # Crypto
-    crypto_keywords = ["bitcoin", "btc", "ethereum", "eth", "crypto", "solana", "sol",
-                       "token", "blockchain", "defi", "nft", "altcoin", "memecoin"]
-    if any(k in q for k in crypto_keywords):
-        return "crypto"
-    
+    ("crypto", ["bitcoin", "btc", "ethereum", "eth", "crypto", "solana", "sol",
+                "token", "blockchain", "defi", "nft", "altcoin", "memecoin"]),
     # Politics
-    politics_keywords = ["president", "election", "congress", "senate", "house", 
-                         "democrat", "republican", "vote", "governor", "mayor",
-                         "trump", "biden", "cabinet", "nomination", "supreme court",
-                         "impeach", "legislation", "bill pass"]
-    if any(k in q for k in politics_keywords):
-        return "politics"
-    
+    ("politics", ["president", "election", "congress", "senate", "house",
+                  "democrat", "republican", "vote", "governor", "mayor",
+                  "trump", "biden", "cabinet", "nomination", "supreme court",
+                  "impeach", "legislation", "bill pass"]),
     # Economics/Fed
-    econ_keywords = ["fed", "interest rate", "inflation", "gdp", "unemployment",
-                     "recession", "fomc", "treasury", "tariff", "trade"]
-    if any(k in q for k in econ_keywords):
-        return "economics"
-    
+    ("economics", ["fed", "interest rate", "inflation", "gdp", "unemployment",
+                   "recession", "fomc", "treasury", "tariff", "trade"]),
     # Geopolitics
-    geo_keywords = ["war", "strike", "invasion", "military", "iran", "russia", 
-                    "china", "ukraine", "israel", "gaza", "hamas", "nato", "sanctions"]
-    if any(k in q for k in geo_keywords):
-        return "geopolitics"
-    
+    ("geopolitics", ["war", "strike", "invasion", "military", "iran", "russia",
+                     "china", "ukraine", "israel", "gaza", "hamas", "nato", "sanctions"]),
     # Tech/AI
-    tech_keywords = ["ai", "openai", "google", "apple", "tesla", "amazon", "meta",
-                     "microsoft", "chatgpt", "model", "launch", "acquisition"]
-    if any(k in q for k in tech_keywords):
-        return "tech"
-    
+    ("tech", ["ai", "openai", "google", "apple", "tesla", "amazon", "meta",
+              "microsoft", "chatgpt", "model", "launch", "acquisition"]),
     # Entertainment
-    ent_keywords = ["oscar", "grammy", "emmy", "movie", "album", "celebrity",
-                    "kardashian", "taylor swift", "elon musk tweet"]
-    if any(k in q for k in ent_keywords):
-        return "entertainment"
-    
+    ("entertainment", ["oscar", "grammy", "emmy", "movie", "album", "celebrity",
+                       "kardashian", "taylor swift", "elon musk tweet"]),
+]
+
+# One compiled alternation per category: a single C-level scan of the
+# question instead of a Python loop over every keyword
+CATEGORY_PATTERNS = [
+    (category, re.compile("|".join(map(re.escape, keywords))))
+    for category, keywords in CATEGORY_KEYWORDS
+]
+
+
+def categorize_market(question: str) -> str:
+    """Attempt to categorize market by keywords"""
+    q = question.lower()
+    for category, pattern in CATEGORY_PATTERNS:
+        if pattern.search(q):
+            return category
     return "other"
 
 
-def score_opportunity(market: Dict) -> float:
+# Tiered score bonuses: a value strictly above TIERS[i-1] (and at most
+# TIERS[i]) earns BONUS[i], i.e. BONUS[bisect_left(TIERS, value)]
+VOL_24H_TIERS = (1000, 10000)
+VOL_24H_BONUS = (0, 5, 10)             # >$1K, >$10K traded in 24h
+LIQUIDITY_TIERS = (1000, 10000, 50000)
+LIQUIDITY_BONUS = (0, 5, 10, 15)       # >$1K, >$10K, >$50K
+DAYS_LEFT_TIERS = (0, 30, 90)
+DAYS_LEFT_BONUS = (-50, 20, 10, 0)     # expired, 1-30d sweet spot, 31-90d, later
+
+
+def score_opportunity(market: ParsedMarket, now: Optional[datetime] = None) -> float:
     """
     Score a market for trading opportunity.
     Higher score = more interesting opportunity.
+    Pass now (tz-aware) when scoring many markets to avoid a clock read each.
     
     Factors:
     - Odds between 20-80% (room for edge, not already decided)
@@ -239,7 +293,7 @@ def score_opportunity(market: Dict) -> float:
     """
     score = 0.0
     
-    yes_price = market["yes_price"]
+    yes_price = market.yes_price
     
     # Odds factor: prefer 20-80% range, peak at 50%
     # Avoid near-certain outcomes (less edge potential)
@@ -253,50 +307,34 @@ def score_opportunity(market: Dict) -> float:
         score += 0  # Too extreme
     
     # Volume factor (log scale)
-    vol = market["volume"]
+    vol = market.volume
     if vol > 0:
         vol_score = min(math.log10(vol + 1) / 6, 1)  # Cap at ~$1M
         score += vol_score * 25
     
     # 24h volume bonus (active trading)
-    vol_24h = market["volume_24h"]
-    if vol_24h > 10000:
-        score += 10
-    elif vol_24h > 1000:
-        score += 5
+    score += VOL_24H_BONUS[bisect_left(VOL_24H_TIERS, market.volume_24h)]
     
     # Liquidity factor
-    liq = market["liquidity"]
-    if liq > 50000:
-        score += 15
-    elif liq > 10000:
-        score += 10
-    elif liq > 1000:
-        score += 5
+    score += LIQUIDITY_BONUS[bisect_left(LIQUIDITY_TIERS, market.liquidity)]
     
     # Time to resolution factor
-    end_date = market["end_date"]
+    end_date = market.end_date
     if end_date:
-        now = datetime.now(end_date.tzinfo) if end_date.tzinfo else datetime.utcnow()
+        if now is None or end_date.tzinfo is None:
+            now = datetime.now(end_date.tzinfo) if end_date.tzinfo else datetime.utcnow()
         days_left = (end_date - now).days
-        
-        if 1 <= days_left <= 30:
-            # Sweet spot: resolves soon but not immediately
-            score += 20
-        elif 30 < days_left <= 90:
-            score += 10
-        elif days_left <= 0:
-            score -= 50  # Already expired
+        score += DAYS_LEFT_BONUS[bisect_left(DAYS_LEFT_TIERS, days_left)]
     
     return score
 
 
-def format_market_summary(m: Dict, score: float) -> str:
+def format_market_summary(m: ParsedMarket, score: float) -> str:
     """Format market for display"""
-    yes_pct = f"{m['yes_price']*100:.1f}%"
-    no_pct = f"{m['no_price']*100:.1f}%"
+    yes_pct = f"{m.yes_price*100:.1f}%"
+    no_pct = f"{m.no_price*100:.1f}%"
     
-    vol = m["volume"]
+    vol = m.volume
     if vol >= 1_000_000:
         vol_str = f"${vol/1_000_000:.1f}M"
     elif vol >= 1_000:
@@ -304,13 +342,13 @@ def format_market_summary(m: Dict, score: float) -> str:
     else:
         vol_str = f"${vol:.0f}"
     
-    end_str = m["end_date"].strftime("%b %d") if m["end_date"] else "?"
+    end_str = m.end_date.strftime("%b %d") if m.end_date else "?"
     
     return f"""
-[MARKET] {m['question'][:80]}{'...' if len(m['question']) > 80 else ''}
+[MARKET] {m.question[:80]}{'...' if len(m.question) > 80 else ''}
    YES: {yes_pct} | NO: {no_pct}
    Vol: {vol_str} | Ends: {end_str} | Score: {score:.0f}
-   Link: {m['url']}"""
+   Link: {m.url}"""
 
 
 def scan_markets(
@@ -320,54 +358,67 @@ def scan_markets(
     categories: List[str] = None,
     limit: int = 20,
     exclude_sports: bool = False
-) -> List[Dict]:
+) -> List[ParsedMarket]:
     """
     Scan all markets and return top opportunities.
     """
+    now = datetime.now(timezone.utc)
+    
+    # Day granularity keeps the request (and its cache key) stable within a day
     print("[SCAN] Fetching all active markets...", file=sys.stderr)
-    raw_markets = fetch_all_active_markets(500)
+    raw_markets = fetch_all_active_markets(
+        500,
+        min_volume=min_volume,
+        min_liquidity=min_liquidity,
+        end_date_min=now.date().isoformat()
+    )
     print(f"   Found {len(raw_markets)} raw markets", file=sys.stderr)
     
-    # Parse and filter
+    # Parse and filter (the API applies the same volume/liquidity floors;
+    # repeated here as a safety net)
     parsed = []
     for m in raw_markets:
-        pm = parse_market_data(m)
-        if pm is None:
+        # Cheap fields first, so rejected markets are never fully parsed
+        quick = quick_market_fields(m)
+        if quick is None:
             continue
+        yes_price, _, vol, liquidity = quick
         
         # Volume filter
-        if pm["volume"] < min_volume:
+        if vol < min_volume:
             continue
         
         # Liquidity filter
-        if pm["liquidity"] < min_liquidity:
+        if liquidity < min_liquidity:
             continue
         
         # Odds filter
-        if not (odds_range[0] <= pm["yes_price"] <= odds_range[1]):
+        if not (odds_range[0] <= yes_price <= odds_range[1]):
+            continue
+        
+        pm = parse_market_data(m, quick)
+        if pm is None:
             continue
         
         # Category
-        pm["category"] = categorize_market(pm["question"])
+        pm.category = categorize_market(pm.question)
         
         # Category filter
-        if categories and pm["category"] not in categories:
+        if categories and pm.category not in categories:
             continue
         
         # Exclude sports if requested
-        if exclude_sports and pm["category"] == "sports":
+        if exclude_sports and pm.category == "sports":
             continue
         
         # Score
-        pm["score"] = score_opportunity(pm)
+        pm.score = score_opportunity(pm, now)
         parsed.append(pm)
     
     print(f"   {len(parsed)} markets after filtering", file=sys.stderr)
     
-    # Sort by score
-    parsed.sort(key=lambda x: x["score"], reverse=True)
-    
-    return parsed[:limit]
+    # Top N by score (partial sort: O(n log k) instead of sorting everything)
+    return heapq.nlargest(limit, parsed, key=attrgetter("score"))
 
 
 def main():
@@ -388,9 +439,14 @@ def main():
                        help="Exclude sports markets")
     parser.add_argument("--json", action="store_true",
                        help="Output as JSON")
+    parser.add_argument("--no-cache", action="store_true",
+                       help="Ignore cached API responses and refetch")
     
     args = parser.parse_args()
     
+    if args.no_cache:
+        set_use_cache(False)
+    
     opportunities = scan_markets(
         min_volume=args.min_volume,
         min_liquidity=args.min_liquidity,
@@ -401,18 +457,15 @@ def main():
     )
     
     if args.json:
-        # Convert datetime to string for JSON
-        for o in opportunities:
-            if o["end_date"]:
-                o["end_date"] = o["end_date"].isoformat()
-        print(json.dumps(opportunities, indent=2))
+        # Datetimes (end_date) serialize as ISO strings
+        print(json.dumps([asdict(o) for o in opportunities], indent=2, default=datetime.isoformat))
     else:
         print(f"\n[TARGET] TOP {len(opportunities)} OPPORTUNITIES\n" + "="*50)
         
         # Group by category
         by_cat = {}
         for o in opportunities:
-            cat = o["category"]
+            cat = o.category
             if cat not in by_cat:
                 by_cat[cat] = []
             by_cat[cat].append(o)
@@ -420,7 +473,7 @@ def main():
         for cat, markets in sorted(by_cat.items(), key=lambda x: -len(x[1])):
             print(f"\n[CATEGORY] {cat.upper()} ({len(markets)})")
             for m in markets:
-                print(format_market_summary(m, m["score"]))
+                print(format_market_summary(m, m.score))
 
 
 if __name__ == "__main__":
@@ -4,47 +4,93 @@ Place trades on Polymarket
 """
 
 import os
+import glob
 import sys
 import argparse
 import json
+import math
+import random
 import re
+import time
+from decimal import Decimal, InvalidOperation
+from functools import lru_cache
 
 # Add venv to path (version-agnostic)
-VENV_BASE = os.path.expanduser("~/polymarket-venv/lib")
-if os.path.exists(VENV_BASE):
-    for entry in os.listdir(VENV_BASE):
-        if entry.startswith("python"):
-            site_packages = os.path.join(VENV_BASE, entry, "site-packages")
-            if site_packages not in sys.path:
-                sys.path.insert(0, site_packages)
-            break
+# POLYMARKET_SITE_PACKAGES (printed by setup.sh) skips the directory scan
+site_packages = os.environ.get("POLYMARKET_SITE_PACKAGES")
+if not site_packages or not os.path.isdir(site_packages):
+    VENV_BASE = os.path.expanduser("~/polymarket-venv/lib")
+    hits = glob.glob(os.path.join(VENV_BASE, "python*", "site-packages"))
+    site_packages = hits[0] if hits else None
+if site_packages:
+    # Exported so child processes inherit the resolved path and skip the scan
+    os.environ["POLYMARKET_SITE_PACKAGES"] = site_packages
+    if site_packages not in sys.path:
+        sys.path.insert(0, site_packages)
 
-from eth_account import Account
-from py_clob_client.client import ClobClient
-from py_clob_client.clob_types import OrderArgs, OrderType, PartialCreateOrderOptions
+from clob_creds import load_or_derive_creds
+
+HEX_TOKEN_RE = re.compile(r'0x[a-fA-F0-9]+')
+
+PRICE_TICK = Decimal("0.01")  # matches the tick_size every order is created with
+MIN_PRICE, MAX_PRICE = Decimal("0.01"), Decimal("0.99")
+POST_ATTEMPTS = 3  # total tries for transient (network / 429 / 5xx) post failures
 
 
 def validate_token_id(token_id: str) -> bool:
     """Validate token ID format (should be numeric string or hex)"""
     if not token_id:
         return False
-    # Polymarket token IDs are typically large integers
-    if re.match(r'^\d+$', token_id):
+    # Polymarket token IDs are typically large integers (isascii excludes
+    # non-ASCII digits like '١٢٣', which isdigit alone would accept)
+    if token_id.isascii() and token_id.isdigit():
         return True
     # Or hex format
-    if re.match(r'^0x[a-fA-F0-9]+$', token_id):
-        return True
-    return False
+    return HEX_TOKEN_RE.fullmatch(token_id) is not None
+
+
+def parse_price(value) -> float:
+    """
+    Parse a limit price exactly (Decimal, not float compares): it must lie in
+    0.01-0.99 and sit on the 0.01 tick, so "0.010000001" is rejected locally
+    instead of by the CLOB after a round-trip.
+    """
+    try:
+        price = Decimal(str(value).strip())
+    except InvalidOperation:
+        raise ValueError(f"invalid price: {value}")
+    if not price.is_finite() or not MIN_PRICE <= price <= MAX_PRICE:
+        raise ValueError("price must be between 0.01 and 0.99")
+    if price % PRICE_TICK:
+        raise ValueError("price must be a multiple of 0.01")
+    return float(price)
+
+
+@lru_cache(maxsize=1)
+def account_from_key(pk):
+    """Derive the signing account from the private key (memoized: constant per process)"""
+    from eth_account import Account
+    return Account.from_key(pk)
+
+
+_CLIENT = None
 
 
 def get_client():
-    """Initialize authenticated CLOB client"""
+    """Initialize authenticated CLOB client (built once, then reused for the process lifetime)"""
+    global _CLIENT
+    if _CLIENT is not None:
+        return _CLIENT
+    
     pk = os.environ.get("POLYMARKET_PRIVATE_KEY")
     if not pk:
         print("Error: POLYMARKET_PRIVATE_KEY not set")
         sys.exit(1)
     
-    account = Account.from_key(pk)
+    # SDK imports are deferred so --help / --dry-run / validation errors stay fast
+    from py_clob_client.client import ClobClient
+    
+    account = account_from_key(pk)
     funder = os.environ.get("POLYMARKET_FUNDER", account.address)
     
     client = ClobClient(
@@ -55,59 +101,215 @@ def get_client():
         # Note: Don't set funder for EOA accounts
     )
     
-    # Get API credentials
-    creds = client.derive_api_key()
+    # Get API credentials (cached after the first derive)
+    creds = load_or_derive_creds(client, account.address)
     client.set_api_creds(creds)
     
+    _CLIENT = client
     return client
 
 
+_ORDER_OPTIONS = None
+
+
+def get_order_options():
+    """Order options shared by every order (tick size 0.01, no neg-risk), built once"""
+    global _ORDER_OPTIONS
+    if _ORDER_OPTIONS is None:
+        from py_clob_client.clob_types import PartialCreateOrderOptions
+        _ORDER_OPTIONS = PartialCreateOrderOptions(
+            tick_size="0.01",
+            neg_risk=False
+        )
+    return _ORDER_OPTIONS
+
+
+def post_with_retry(client, signed_order):
+    """
+    Post a signed order, retrying transient failures with jittered exponential
+    backoff. Every attempt re-sends the same signed order (same salt and hash),
+    so a retry after an ambiguous timeout can't create a second order.
+    """
+    from py_clob_client.exceptions import PolyApiException
+    
+    for attempt in range(POST_ATTEMPTS):
+        try:
+            return client.post_order(signed_order)
+        except PolyApiException as e:
+            # status_code is None for connection errors/timeouts
+            transient = e.status_code is None or e.status_code == 429 or e.status_code >= 500
+            if not transient or attempt == POST_ATTEMPTS - 1:
+                raise
+        time.sleep(min(0.3 * 2 ** attempt + random.random() * 0.1, 2.0))
+
+
 def place_order(client, token_id, side, price, size, order_type="limit"):
     """Place a limit or market order"""
+    from py_clob_client.clob_types import OrderArgs
+    from py_clob_client.exceptions import PolyApiException
     
-    # Build order args
-    order_args = OrderArgs(
-        token_id=token_id,
-        price=price,
-        size=size,
-        side=side.upper()  # BUY or SELL
-    )
+    # One canonical description of the order, reused for OrderArgs and errors
+    order_kwargs = {
+        "token_id": token_id,
+        "price": price,
+        "size": size,
+        "side": side.upper()  # BUY or SELL
+    }
+    order_args = OrderArgs(**order_kwargs)
     
-    # Create order options with tick_size
-    options = PartialCreateOrderOptions(
-        tick_size="0.01",
-        neg_risk=False
-    )
+    options = get_order_options()
     
     try:
-        # Create and post the order
-        result = client.create_and_post_order(order_args, options)
-        return result
+        # Sign once; retries and the creds refresh below re-send this same order
+        signed_order = client.create_order(order_args, options)
+        try:
+            return post_with_retry(client, signed_order)
+        except PolyApiException as e:
+            # Cached creds no longer accepted: re-derive once and retry
+            # (a 401 is rejected before the order is accepted, so this can't double-post)
+            if e.status_code != 401:
+                raise
+            creds = load_or_derive_creds(client, client.get_address(), refresh=True)
+            client.set_api_creds(creds)
+            return post_with_retry(client, signed_order)
     except Exception as e:
-        return {"error": str(e)}
+        # Include the order so batch callers can tell which one failed
+        return {"error": str(e), "order": order_kwargs}
+
+
+def confirm(prompt):
+    """Ask for a yes/no confirmation; exit 2 rather than block when stdin isn't a terminal"""
+    if not sys.stdin.isatty():
+        print("Error: stdin is not a terminal and --yes not given")
+        sys.exit(2)
+    return input(f"{prompt} (yes/no): ").strip().lower() == "yes"
+
+
+def format_result(result, pretty):
+    """Indented JSON for a terminal, compact one-line JSON for pipes"""
+    if pretty:
+        return json.dumps(result, indent=2, default=str)
+    return json.dumps(result, separators=(",", ":"), default=str)
+
+
+def load_batch(path):
+    """Load and validate a batch file: a JSON list of {token_id, side, price, size}"""
+    try:
+        with open(path) as f:
+            records = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"Error: cannot read batch file {path}: {e}")
+        sys.exit(1)
+    
+    if not isinstance(records, list) or not records:
+        print("Error: batch file must contain a non-empty JSON list of orders")
+        sys.exit(1)
+    
+    # Validate everything before any order is sent
+    orders = []
+    for i, rec in enumerate(records, 1):
+        try:
+            token_id = str(rec["token_id"])
+            side = str(rec["side"]).upper()
+            raw_price = rec["price"]
+            size = float(rec["size"])
+        except (KeyError, TypeError, ValueError):
+            print(f"Error: order #{i} needs token_id, side, price and size")
+            sys.exit(1)
+        
+        if not validate_token_id(token_id):
+            print(f"Error: order #{i}: invalid token ID format: {token_id}")
+            sys.exit(1)
+        if side not in ("BUY", "SELL"):
+            print(f"Error: order #{i}: side must be BUY or SELL")
+            sys.exit(1)
+        try:
+            price = parse_price(raw_price)
+        except ValueError as e:
+            print(f"Error: order #{i}: {e}")
+            sys.exit(1)
+        if not math.isfinite(size) or size <= 0:
+            print(f"Error: order #{i}: size must be a positive number")
+            sys.exit(1)
+        
+        orders.append({"token_id": token_id, "side": side, "price": price, "size": size})
+    
+    return orders
+
+
+def run_batch(args):
+    """Place every order in a batch file over one authenticated client"""
+    orders = load_batch(args.batch)
+    
+    print(f"=== Batch: {len(orders)} orders ===")
+    for o in orders:
+        print(f"{o['side']} {o['token_id']} @ ${o['price']:.2f} x ${o['size']:.2f} USDC")
+    print()
+    
+    if args.dry_run:
+        print("(Dry run - orders not placed)")
+        return
+    
+    # Confirm (skip if --yes flag)
+    if not args.yes and not confirm(f"Place {len(orders)} orders?"):
+        print("Orders cancelled")
+        return
+    
+    # Client setup (creds, connection) is paid once for the whole batch
+    client = get_client()
+    results = [place_order(client, **o) for o in orders]
+    
+    failed = sum(1 for r in results if "error" in r)
+    print(f"{len(orders) - failed}/{len(orders)} orders placed")
+    print(format_result(results, sys.stdout.isatty() and not args.quiet))
+    if failed:
+        sys.exit(1)
 
 
 def main():
     parser = argparse.ArgumentParser(description="Trade on Polymarket")
-    parser.add_argument("action", choices=["buy", "sell"],
+    parser.add_argument("action", nargs="?", choices=["buy", "sell"],
                        help="Buy or sell")
-    parser.add_argument("token_id",
+    parser.add_argument("token_id", nargs="?",
                        help="Token ID to trade (get from markets.py detail)")
-    parser.add_argument("--price", "-p", type=float,
-                       help="Limit price (0.01-0.99)")
-    parser.add_argument("--size", "-s", type=float, required=True,
-                       help="Size in USDC")
+    parser.add_argument("--price", "-p",
+                       help="Limit price (0.01-0.99, in 0.01 steps)")
+    parser.add_argument("--size", "-s", type=float,
+                       help="Size in USDC (required for single orders)")
     parser.add_argument("--market", "-m", action="store_true",
                        help="Market order (take best available)")
-    parser.add_argument("--side", choices=["YES", "NO"], default="YES",
+    parser.add_argument("--side", choices=["YES", "NO"],
                        help="YES or NO outcome (default: YES)")
     parser.add_argument("--dry-run", action="store_true",
                        help="Show order details without executing")
     parser.add_argument("--yes", "-y", action="store_true",
                        help="Skip confirmation prompt (for automated trading)")
+    parser.add_argument("--quiet", "-q", action="store_true",
+                       help="Compact JSON result (default when output is piped)")
+    parser.add_argument("--batch", metavar="PATH",
+                       help="Place a JSON list of {token_id, side, price, size} orders")
     
     args = parser.parse_args()
     
+    if args.batch:
+        if args.action or args.token_id:
+            parser.error("--batch cannot be combined with action/token_id")
+        # Per-order fields come from the file; don't let flags look like overrides
+        single_flags = {"--price": args.price is not None, "--size": args.size is not None,
+                        "--market": args.market, "--side": args.side is not None}
+        conflicts = [flag for flag, given in single_flags.items() if given]
+        if conflicts:
+            parser.error(f"--batch cannot be combined with {', '.join(conflicts)}")
+        run_batch(args)
+        return
+    
+    if not args.action or not args.token_id:
+        parser.error("action and token_id are required (or use --batch)")
+    if args.size is None:
+        parser.error("--size is required")
+    if not math.isfinite(args.size) or args.size <= 0:
+        parser.error("--size must be a positive number")
+    
     # Validate token ID
     if not validate_token_id(args.token_id):
         print(f"Error: Invalid token ID format: {args.token_id}")
@@ -119,17 +321,21 @@ def main():
         print("Error: --price required for limit orders (use --market for market orders)")
         sys.exit(1)
     
-    if args.price and (args.price < 0.01 or args.price > 0.99):
-        print("Error: price must be between 0.01 and 0.99")
-        sys.exit(1)
+    limit_price = None
+    if args.price is not None:
+        try:
+            limit_price = parse_price(args.price)
+        except ValueError as e:
+            print(f"Error: {e}")
+            sys.exit(1)
     
     # Build order details
     side = "BUY" if args.action == "buy" else "SELL"
-    price = args.price if args.price else 0.99 if side == "BUY" else 0.01
+    price = limit_price if limit_price is not None else 0.99 if side == "BUY" else 0.01
     order_type = "market" if args.market else "limit"
     
     print(f"=== Order Details ===")
-    print(f"Action: {side} {args.side}")
+    print(f"Action: {side} {args.side or 'YES'}")
     print(f"Token ID: {args.token_id}")
     print(f"Price: ${price:.2f}")
     print(f"Size: ${args.size:.2f} USDC")
@@ -141,11 +347,9 @@ def main():
         return
     
     # Confirm (skip if --yes flag)
-    if not args.yes:
-        confirm = input("Place order? (yes/no): ").strip().lower()
-        if confirm != "yes":
-            print("Order cancelled")
-            return
+    if not args.yes and not confirm("Place order?"):
+        print("Order cancelled")
+        return
     
     client = get_client()
     result = place_order(client, args.token_id, side, price, args.size, order_type)
@@ -154,7 +358,7 @@ def main():
         print(f"X Order failed: {result['error']}")
     else:
         print(f"OK Order placed!")
-        print(json.dumps(result, indent=2, default=str))
+        print(format_result(result, sys.stdout.isatty() and not args.quiet))
 
 
 if __name__ == "__main__":
@@ -55,6 +55,21 @@ if [ -z "$EXA_API_KEY" ]; then
     MISSING_CREDS=1
 fi
 
+# Resolve venv site-packages once so scripts can skip the directory scan
+SITE_PACKAGES=""
+for VENV_PY in "$HOME/polymarket-venv/bin/python" "$HOME/polymarket-venv/Scripts/python"; do
+    if [ -x "$VENV_PY" ]; then
+        SITE_PACKAGES=$("$VENV_PY" -c "import sysconfig; print(sysconfig.get_paths()['purelib'])" 2>/dev/null || true)
+        break
+    fi
+done
+
+if [ -n "$SITE_PACKAGES" ] && [ "$POLYMARKET_SITE_PACKAGES" != "$SITE_PACKAGES" ]; then
+    echo ""
+    echo "[TIP] Faster script startup - add to $SHELL_CONFIG:"
+    echo "  export POLYMARKET_SITE_PACKAGES=\"$SITE_PACKAGES\""
+fi
+
 if [ $MISSING_CREDS -eq 1 ]; then
     echo ""
     echo "After adding keys, run: source $SHELL_CONFIG"